@@ -1,8 +1,127 @@
+import asyncio
 import subprocess
-from typing import Dict, List, Union
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import asynccontextmanager
+from typing import Callable, Dict, List, Union
+
+from sqlalchemy import (
+    Integer,
+    MetaData,
+    UniqueConstraint,
+    create_engine,
+    event,
+    exc,
+)
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+from sqlalchemy.orm import scoped_session, sessionmaker
+from sqlalchemy.pool import NullPool, StaticPool
+
+# Drivers assíncronos equivalentes a cada dialeto suportado
+ASYNC_DIALECTS = {
+    'sqlite': 'sqlite+aiosqlite',
+    'mysql+pymysql': 'mysql+aiomysql',
+    'postgresql': 'postgresql+asyncpg',
+}
+
+# Chaves obrigatórias por tipo de banco, na ordem usada nas mensagens de erro
+_REQUIRED_SQLITE = ('name', 'dialect', 'database')
+_REQUIRED_OTHER = _REQUIRED_SQLITE + ('username', 'password', 'host', 'port')
+
+# Modelos de URL de conexão por dialeto
+_URL_TEMPLATES = {'sqlite': '{dialect}:///{database}'}
+_DEFAULT_URL = '{dialect}://{username}:{password}@{host}:{port}/{database}'
+
+
+def _discard_closed_connection(
+    dbapi_connection, connection_record, connection_proxy
+):
+    """
+    Descarta no checkout conexões que o driver já reporta como fechadas.
+
+    Alternativa ao `pool_pre_ping` que não faz consulta ao banco: o pool
+    substitui a conexão por uma nova ao receber `DisconnectionError`.
+    """
+    # psycopg2 expõe `closed` (int) e pymysql expõe `open` (bool)
+    if getattr(dbapi_connection, 'closed', False) or not getattr(
+        dbapi_connection, 'open', True
+    ):
+        raise exc.DisconnectionError('Conexão encerrada pelo servidor.')
+
+
+def _check_required_keys(config, required_keys):
+    """
+    Verifica se as chaves obrigatórias estão presentes e preenchidas e se o nome é válido.
+
+    Args:
+        config (dict): Configuração para a conexão com o banco de dados.
+        required_keys (tuple): Chaves obrigatórias, na ordem usada na mensagem de erro.
+
+    Raises:
+        ValueError: Se alguma chave estiver ausente ou vazia, ou se o nome for inválido.
+    """
+    # A lista só é montada quando há erro
+    if not all(config.get(key) for key in required_keys):
+        missing_keys = [key for key in required_keys if not config.get(key)]
+        raise ValueError(
+            f"Configuração inválida, valores ausentes ou vazios: {', '.join(missing_keys)}"
+        )
+
+    if not isinstance(config['name'], str) or not config['name'].strip():
+        raise ValueError("O campo 'name' deve ser uma string não vazia.")
+
+
+def _validate_sqlite(config):
+    """
+    Valida uma configuração SQLite.
+
+    Args:
+        config (dict): Configuração para a conexão com o banco de dados.
+
+    Raises:
+        ValueError: Se houver chaves ausentes ou valores inválidos.
+    """
+    _check_required_keys(config, _REQUIRED_SQLITE)
+
+
+def _validate_tcp(config):
+    """
+    Valida uma configuração de banco acessado por host e porta (MySQL, PostgreSQL).
+
+    Args:
+        config (dict): Configuração para a conexão com o banco de dados.
+
+    Raises:
+        ValueError: Se houver chaves ausentes ou valores inválidos.
+    """
+    _check_required_keys(config, _REQUIRED_OTHER)
+
+    if not isinstance(config['host'], str) or not config['host'].strip():
+        raise ValueError("O campo 'host' deve ser uma string não vazia.")
 
-from sqlalchemy import create_engine, exc
-from sqlalchemy.orm import sessionmaker
+    if not isinstance(config['port'], int) or not (
+        1 <= config['port'] <= 65535
+    ):
+        raise ValueError(
+            "O campo 'port' deve ser um número inteiro entre 1 e 65535."
+        )
+
+    if (
+        not isinstance(config['username'], str)
+        or not config['username'].strip()
+    ):
+        raise ValueError("O campo 'username' deve ser uma string não vazia.")
+
+    if not isinstance(config['password'], str):
+        raise ValueError("O campo 'password' deve ser uma string.")
+
+
+# Validador de cada dialeto suportado
+_VALIDATORS: Dict[str, Callable[[dict], None]] = {
+    'sqlite': _validate_sqlite,
+    'mysql+pymysql': _validate_tcp,
+    'postgresql': _validate_tcp,
+}
 
 
 class DatabaseConnectionManager:
@@ -14,6 +133,25 @@ class DatabaseConnectionManager:
             Dicionário contendo as conexões ativas.
             A chave é o nome da conexão e o valor é outro dicionário com o engine SQLAlchemy e a factory de sessões.
 
+    Note:
+        Cada configuração aceita chaves opcionais para ajustar o pool de conexões
+        (ignoradas para SQLite, que usa `StaticPool` em `:memory:` e `NullPool`
+        para arquivos):
+
+        - `pool_size` (int): Conexões mantidas abertas no pool (default: 10).
+        - `max_overflow` (int): Conexões extras permitidas além do `pool_size` (default: 20).
+        - `pool_recycle` (int): Segundos até uma conexão ser reciclada (default: 1800).
+        - `pool_timeout` (int): Segundos de espera por uma conexão livre (default: 30).
+        - `pool_pre_ping` (bool): Testa a conexão com o banco a cada checkout (default: True).
+          Quando desativado, conexões já fechadas pelo driver são descartadas sem
+          consulta ao banco.
+
+        Configurações com a mesma URL e opções de pool compartilham a mesma engine,
+        inclusive entre gerenciadores diferentes (exceto SQLite em memória). Cada
+        conexão conta como uma referência: `close_all_connections` libera as
+        referências do gerenciador e só fecha e descarta do cache as engines que
+        nenhuma outra conexão utiliza.
+
     Examples:
         >>> from SDSDG_Lib import DatabaseConnectionManager
 
@@ -44,8 +182,17 @@ class DatabaseConnectionManager:
 
         ### Obtém uma sessão para uma das conexões
             >>> session = db_manager.get_session("main_db")
+
+        ### Obtém uma sessão assíncrona (requer o driver async do dialeto)
+            >>> async with db_manager.get_async_session("main_db") as session:
+            ...     await session.execute(text("SELECT 1"))
     """
 
+    # Engines compartilhadas entre configurações com a mesma URL e opções de pool,
+    # no formato {chave: [engine, quantidade de conexões que a utilizam]}
+    _engine_cache = {}
+    _engine_cache_lock = threading.Lock()
+
     def __init__(self, configs: List[Dict[str, Union[str, int]]]):
         """
         Inicializa o gerenciador de conexões com base nas configurações fornecidas.
@@ -55,14 +202,32 @@ class DatabaseConnectionManager:
         """
         self.configs = configs
         self.connections = {}
+        self._lock = threading.Lock()
+        self._config_by_name = {}  # Índice das configurações já validadas
 
-        for config in configs:
-            try:
-                self.add_connection(config)
-            except Exception as e:
+        if not configs:
+            return
+
+        # Cria as conexões em paralelo e registra na ordem das configurações
+        with ThreadPoolExecutor(max_workers=min(len(configs), 8)) as executor:
+            futures = [
+                executor.submit(self._create_connection, config)
+                for config in configs
+            ]
+
+        for config, future in zip(configs, futures):
+            e = future.exception()
+            if e is not None:
+                # Libera as engines já criadas antes de reportar o erro
+                for created in futures:
+                    if created.exception() is None and created.result():
+                        self._release_engine(created.result())
                 raise ValueError(
                     f"Erro ao adicionar conexão {config.get('name', '<sem_nome>')}: {e}"
                 )
+            self._register_connection(config, future.result())
+            # Em nomes repetidos prevalece a primeira configuração
+            self._config_by_name.setdefault(config['name'], config)
 
     def add_connection(self, config: Dict[str, Union[str, int]]):
         """
@@ -74,22 +239,63 @@ class DatabaseConnectionManager:
         Raises:
             ValueError: Se o dicionário de configuração estiver incompleto ou contiver valores inválidos.
         """
+        connection = self._create_connection(config)
+        self._register_connection(config, connection)
+        if connection is not None:
+            with self._lock:
+                self._config_by_name[config['name']] = config
 
-        try:
-            config_v, missing_keys = self.validate_requirements_keys(config)
-            if config_v:
-                connection_string = self.build_connection_url(config)
-                engine = create_engine(connection_string)
-                Session = sessionmaker(bind=engine)
-                self.connections[config['name']] = {
-                    'engine': engine,
-                    'session': Session,
-                }
+    def _register_connection(self, config, connection):
+        """
+        Registra uma conexão criada, de forma segura entre threads.
 
-            else:
-                raise ValueError(
-                    f"Configuração inválida, valores ausentes ou vazios: {', '.join(missing_keys)}"
+        Args:
+            config (dict): Configurações da conexão com o banco de dados.
+            connection (dict): Engine, factory de sessões e configuração da conexão.
+        """
+        if connection is None:
+            return
+        with self._lock:
+            previous = self.connections.get(config['name'])
+            self.connections[config['name']] = connection
+        # A conexão substituída libera suas engines síncrona e assíncrona
+        if previous is not None:
+            self._dispose_connection(previous)
+
+    def _create_connection(self, config: Dict[str, Union[str, int]]):
+        """
+        Valida a configuração e cria o engine e a factory de sessões da conexão.
+
+        Args:
+            config (dict): Configurações para a conexão com o banco de dados.
+
+        Returns:
+            dict: Engine, factory de sessões, configuração e URL da conexão.
+
+        Raises:
+            ValueError: Se o dicionário de configuração estiver incompleto ou contiver valores inválidos.
+        """
+
+        try:
+            connection_string = self.validate_requirements_keys(config)
+            engine_options = self.build_engine_options(config)
+            engine, engine_key = self._acquire_engine(
+                connection_string, engine_options
+            )
+            # Reaproveita a mesma sessão dentro de cada thread; objetos não
+            # expiram no commit e consultas não disparam flush automático
+            Session = scoped_session(
+                sessionmaker(
+                    bind=engine, expire_on_commit=False, autoflush=False
                 )
+            )
+            return {
+                'engine': engine,
+                'session': Session,
+                'config': config,
+                'url': connection_string,
+                'engine_key': engine_key,
+            }
         except subprocess.SubprocessError as e:
             if 'Access denied' in str(e):
                 raise PermissionError(
@@ -97,9 +303,88 @@ class DatabaseConnectionManager:
                     'Verifique suas credenciais de autenticação.'
                 )
 
+    @classmethod
+    def _acquire_engine(cls, connection_string, engine_options):
+        """
+        Retorna a engine já criada para a URL e opções de pool, ou cria uma nova.
+
+        Cada chamada soma uma referência à engine compartilhada, liberada por
+        `_release_engine`. Bancos SQLite em memória não são compartilhados, pois
+        cada engine mantém seu próprio banco.
+
+        Args:
+            connection_string (str): URL de conexão no formato esperado por SQLAlchemy.
+            engine_options (dict): Argumentos nomeados para `create_engine`.
+
+        Returns:
+            tuple: A engine para a URL de conexão e sua chave no cache (None se não for compartilhada).
+        """
+        if 'connect_args' in engine_options:
+            return cls._create_engine(connection_string, engine_options), None
+
+        key = (connection_string, tuple(sorted(engine_options.items())))
+        with cls._engine_cache_lock:
+            entry = cls._engine_cache.get(key)
+            if entry is None:
+                entry = [
+                    cls._create_engine(connection_string, engine_options),
+                    0,
+                ]
+                cls._engine_cache[key] = entry
+            entry[1] += 1
+        return entry[0], key
+
+    @classmethod
+    def _release_engine(cls, conn):
+        """
+        Libera a referência de uma conexão à sua engine, fechando-a se for a última.
+
+        Args:
+            conn (dict): Conexão registrada no gerenciador.
+        """
+        if conn.get('engine_released'):
+            return
+
+        key = conn.get('engine_key')
+        if key is not None:
+            with cls._engine_cache_lock:
+                entry = cls._engine_cache.get(key)
+                if entry is not None:
+                    entry[1] -= 1
+                    if entry[1] > 0:
+                        # Ainda utilizada por outras conexões
+                        conn['engine_released'] = True
+                        return
+                    del cls._engine_cache[key]
+
+        conn['engine'].dispose()
+        conn['engine_released'] = True
+
+    @staticmethod
+    def _create_engine(connection_string, engine_options):
+        """
+        Cria a engine e registra o descarte de conexões fechadas sem pre ping.
+
+        Args:
+            connection_string (str): URL de conexão no formato esperado por SQLAlchemy.
+            engine_options (dict): Argumentos nomeados para `create_engine`.
+
+        Returns:
+            sqlalchemy.engine.Engine: A engine criada.
+        """
+        engine = create_engine(connection_string, **engine_options)
+        if engine_options.get('pool_pre_ping') is False:
+            event.listen(engine, 'checkout', _discard_closed_connection)
+        return engine
+
     def get_session(self, name: str):
         """
-        Retorna uma sessão para o banco de dados especificado.
+        Retorna a sessão da thread atual para o banco de dados especificado.
+
+        Chamadas na mesma thread recebem a mesma sessão até `remove_session`.
+        A sessão não expira os objetos no commit nem faz flush automático antes
+        das consultas; use `session.flush()` quando precisar consultar dados
+        ainda não enviados ao banco.
 
         Args:
             name (str): Nome da conexão configurada.
@@ -119,6 +404,68 @@ class DatabaseConnectionManager:
                 f"Erro ao criar sessão para conexão '{name}': {e}"
             )
 
+    def remove_session(self, name: str):
+        """
+        Fecha e descarta a sessão da thread atual para o banco de dados especificado.
+
+        Args:
+            name (str): Nome da conexão configurada.
+
+        Raises:
+            ValueError: Se a conexão especificada não for encontrada.
+        """
+        if name not in self.connections:
+            raise ValueError(f"Conexão '{name}' não encontrada.")
+        self.connections[name]['session'].remove()
+
+    @asynccontextmanager
+    async def get_async_session(self, name: str):
+        """
+        Fornece uma sessão assíncrona para o banco de dados especificado.
+
+        O engine assíncrono é criado no primeiro uso, pois depende do driver
+        async do dialeto (`aiosqlite`, `aiomysql` ou `asyncpg`) estar instalado.
+
+        Args:
+            name (str): Nome da conexão configurada.
+
+        Yields:
+            sqlalchemy.ext.asyncio.AsyncSession: Uma sessão assíncrona para o banco de dados especificado.
+
+        Raises:
+            ValueError: Se a conexão especificada não for encontrada.
+            RuntimeError: Se não for possível criar o engine assíncrono.
+        """
+        if name not in self.connections:
+            raise ValueError(f"Conexão '{name}' não encontrada.")
+
+        connection = self.connections[name]
+        if 'async_session' not in connection:
+            try:
+                config = connection['config']
+                # Troca apenas o prefixo do dialeto pelo driver assíncrono
+                async_url = (
+                    ASYNC_DIALECTS[config['dialect']]
+                    + connection['url'][len(config['dialect']) :]
+                )
+                async_engine = create_async_engine(
+                    async_url, **self.build_engine_options(config)
+                )
+            except Exception as e:
+                raise RuntimeError(
+                    f"Erro ao criar engine assíncrona para conexão '{name}': {e}"
+                )
+            connection['async_engine'] = async_engine
+            connection['async_session'] = sessionmaker(
+                bind=async_engine,
+                class_=AsyncSession,
+                expire_on_commit=False,
+                autoflush=False,
+            )
+
+        async with connection['async_session']() as session:
+            yield session
+
     def get_engine(self, name: str):
         """
         Retorna a engine para o banco de dados especificado.
@@ -141,16 +488,142 @@ class DatabaseConnectionManager:
                 f"Erro ao criar engine para conexão '{name}': {e}"
             )
 
+    def describe_schema(self, name: str, refresh: bool = False) -> str:
+        """
+        Descreve a estrutura do banco de dados em um formato textual compacto.
+
+        As tabelas são refletidas pelo SQLAlchemy e os metadados ficam em cache
+        na conexão, evitando novas consultas ao banco nas chamadas seguintes.
+
+        Args:
+            name (str): Nome da conexão configurada.
+            refresh (bool): Reflete novamente as tabelas do banco. Default é False.
+
+        Returns:
+            str: Uma linha por tabela com colunas, tipos, restrições e chaves estrangeiras.
+
+        Raises:
+            ValueError: Se a conexão especificada não for encontrada.
+        """
+        if name not in self.connections:
+            raise ValueError(f"Conexão '{name}' não encontrada.")
+
+        connection = self.connections[name]
+        if refresh or 'metadata' not in connection:
+            metadata = MetaData()
+            metadata.reflect(bind=connection['engine'])
+            connection['metadata'] = metadata
+
+        lines = []
+        for table in connection['metadata'].sorted_tables:
+            # Restrições UNIQUE refletidas como constraints ou índices únicos
+            uniques = {
+                tuple(column.name for column in constraint.columns)
+                for constraint in table.constraints
+                if isinstance(constraint, UniqueConstraint)
+            } | {
+                tuple(column.name for column in index.columns)
+                for index in table.indexes
+                if index.unique
+            }
+            columns = ', '.join(
+                self._describe_column(table, column, uniques)
+                for column in table.columns
+            )
+            line = f'{table.name}({columns})'
+            for unique in sorted(u for u in uniques if len(u) > 1):
+                line += f" UNIQUE({', '.join(unique)})"
+            if table.foreign_keys:
+                fks = ', '.join(
+                    f'{fk.parent.name}->{fk.target_fullname}'
+                    for fk in sorted(
+                        table.foreign_keys,
+                        key=lambda fk: (fk.parent.name, fk.target_fullname),
+                    )
+                )
+                line += f' FKs: {fks}'
+            lines.append(line)
+
+        return '\n'.join(lines)
+
+    @staticmethod
+    def _describe_column(table, column, uniques) -> str:
+        """
+        Descreve uma coluna com seu tipo e as restrições relevantes para a geração de dados.
+
+        Args:
+            table (sqlalchemy.Table): Tabela refletida que contém a coluna.
+            column (sqlalchemy.Column): Coluna a ser descrita.
+            uniques (set): Conjuntos de colunas com restrição UNIQUE na tabela.
+
+        Returns:
+            str: Nome, tipo e restrições da coluna (PK, AUTOINCREMENT, NOT NULL, UNIQUE).
+        """
+        flags = []
+        if column.primary_key:
+            flags.append('PK')
+            if (
+                len(table.primary_key.columns) == 1
+                and column.autoincrement in (True, 'auto')
+                and isinstance(column.type, Integer)
+            ):
+                flags.append('AUTOINCREMENT')
+        elif not column.nullable:
+            flags.append('NOT NULL')
+        if (column.name,) in uniques:
+            flags.append('UNIQUE')
+
+        return ' '.join([f'{column.name}:{column.type}', *flags])
+
     def close_all_connections(self):
         """
         Fecha todas as conexões gerenciadas.
+
+        Engines assíncronas são fechadas em um event loop próprio; dentro de um
+        event loop em execução, use `close_all_connections_async`.
+        """
+        # Fecha as engines em paralelo, reportando o primeiro erro na ordem das conexões
+        with ThreadPoolExecutor(
+            max_workers=min(32, len(self.connections)) or 1
+        ) as executor:
+            futures = {
+                name: executor.submit(self._dispose_connection, conn)
+                for name, conn in self.connections.items()
+            }
+
+        for name, future in futures.items():
+            e = future.exception()
+            if e is not None:
+                raise ValueError(f"Erro ao fechar conexão '{name}': {e}")
+        self.connections.clear()
+
+    @staticmethod
+    def _dispose_connection(conn):
+        """
+        Fecha as engines síncrona e assíncrona de uma conexão.
+
+        A engine síncrona compartilhada só é fechada quando nenhuma outra
+        conexão a utiliza.
+
+        Args:
+            conn (dict): Conexão registrada no gerenciador.
+        """
+        DatabaseConnectionManager._release_engine(conn)
+        if 'async_engine' in conn:
+            asyncio.run(conn['async_engine'].dispose())
+
+    async def close_all_connections_async(self):
+        """
+        Fecha todas as conexões gerenciadas a partir de um event loop.
         """
         for name, conn in self.connections.items():
             try:
-                conn['engine'].dispose()
+                if 'async_engine' in conn:
+                    await conn.pop('async_engine').dispose()
+                    del conn['async_session']
             except Exception as e:
                 raise ValueError(f"Erro ao fechar conexão '{name}': {e}")
-        self.connections.clear()
+        self.close_all_connections()
 
     def get_config_by_name(self, name):
         """
@@ -165,10 +638,12 @@ class DatabaseConnectionManager:
         Raises:
             ValueError: Se nenhuma configuração for encontrada com o nome fornecido.
         """
-        for config in self.configs:
-            if config.get('name') == name:
-                return config
-        raise ValueError(f"Configuração com o nome '{name}' não encontrada.")
+        try:
+            return self._config_by_name[name]
+        except KeyError:
+            raise ValueError(
+                f"Configuração com o nome '{name}' não encontrada."
+            )
 
     @staticmethod
     def build_connection_url(config: Dict[str, Union[str, int]]) -> str:
@@ -184,77 +659,63 @@ class DatabaseConnectionManager:
         Raises:
             ValueError: Se o dicionário de configuração estiver incompleto.
         """
+        return _URL_TEMPLATES.get(
+            config.get('dialect'), _DEFAULT_URL
+        ).format_map(config)
+
+    @staticmethod
+    def build_engine_options(config: Dict[str, Union[str, int]]) -> dict:
+        """
+        Monta os parâmetros do pool de conexões repassados ao `create_engine`.
 
+        Args:
+            config (dict): Configurações para a conexão com o banco de dados.
+
+        Returns:
+            dict: Argumentos nomeados para `create_engine`.
+        """
         if config.get('dialect') == 'sqlite':
-            url = f"{config['dialect']}:///{config['database']}"
-        else:
-            url = (
-                f"{config['dialect']}://{config['username']}:{config['password']}@"
-                f"{config['host']}:{config['port']}/{config['database']}"
-            )
+            if config.get('database') == ':memory:':
+                # Uma única conexão compartilhada mantém o banco em memória entre sessões
+                return {
+                    'poolclass': StaticPool,
+                    'connect_args': {'check_same_thread': False},
+                }
+            return {'poolclass': NullPool}
 
-        return url
+        return {
+            'pool_size': config.get('pool_size', 10),
+            'max_overflow': config.get('max_overflow', 20),
+            'pool_pre_ping': config.get('pool_pre_ping', True),
+            'pool_recycle': config.get('pool_recycle', 1800),
+            'pool_timeout': config.get('pool_timeout', 30),
+        }
 
     @staticmethod
-    def validate_requirements_keys(config):
+    def validate_requirements_keys(config: Dict[str, Union[str, int]]) -> str:
         """
-        Valida as chaves e valores de configuração antes de estabelecer uma conexão.
+        Valida as chaves e valores de configuração e monta a URL de conexão.
 
         Args:
             config (dict): Configuração para a conexão com o banco de dados.
 
         Returns:
-            tuple: (config, None) se válido; (None, missing_keys) se inválido.
+            str: URL de conexão no formato esperado por SQLAlchemy.
 
         Raises:
-            ValueError: Se houver erros de validação nos valores fornecidos.
+            ValueError: Se houver chaves ausentes ou erros de validação nos valores fornecidos.
         """
-        required_keys = ['name', 'dialect', 'database']
-        is_sqlite = config.get('dialect') == 'sqlite'
-
-        # Chaves adicionais obrigatórias para bancos que não são SQLite
-        if not is_sqlite:
-            required_keys.extend(['username', 'password', 'host', 'port'])
-
-        # Verifica chaves ausentes
-        missing_keys = [key for key in required_keys if not config.get(key)]
-        if missing_keys:
-            return None, missing_keys
-
-        # Validações adicionais para valores
-        if not isinstance(config['name'], str) or not config['name'].strip():
-            raise ValueError("O campo 'name' deve ser uma string não vazia.")
-
-        if config['dialect'] not in ['sqlite', 'mysql+pymysql', 'postgresql']:
+        dialect = config.get('dialect')
+        # Dialetos que não são strings (ex.: listas) seguem para o erro de validação
+        validator = (
+            _VALIDATORS.get(dialect) if isinstance(dialect, str) else None
+        )
+        if validator is None:
+            # Chaves ausentes são reportadas antes do dialeto não suportado
+            _check_required_keys(config, _REQUIRED_OTHER)
             raise ValueError(
                 f"Dialeto '{config['dialect']}' não suportado. Use 'sqlite', 'mysql' ou 'postgresql'."
             )
+        validator(config)
 
-        if not is_sqlite:
-            if (
-                not isinstance(config['host'], str)
-                or not config['host'].strip()
-            ):
-                raise ValueError(
-                    "O campo 'host' deve ser uma string não vazia."
-                )
-
-            if not isinstance(config['port'], int) or not (
-                1 <= config['port'] <= 65535
-            ):
-                raise ValueError(
-                    "O campo 'port' deve ser um número inteiro entre 1 e 65535."
-                )
-
-            if (
-                not isinstance(config['username'], str)
-                or not config['username'].strip()
-            ):
-                raise ValueError(
-                    "O campo 'username' deve ser uma string não vazia."
-                )
-
-            if not isinstance(config['password'], str):
-                raise ValueError("O campo 'password' deve ser uma string.")
-
-        return config, None
+        return DatabaseConnectionManager.build_connection_url(config)
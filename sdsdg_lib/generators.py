@@ -1,15 +1,177 @@
+import asyncio
+import hashlib
+import importlib.util
+import json
 import os
+import shutil
 import subprocess
-
-import tiktoken
-from openai import OpenAI
+from collections import OrderedDict, deque
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from functools import lru_cache
+from pathlib import Path
+from typing import TYPE_CHECKING, Dict, Iterator, List, Optional, Tuple
 
 from .database import DatabaseConnectionManager
 
+# tiktoken, openai e httpx são importados sob demanda para agilizar o import da lib
+if TYPE_CHECKING:
+    import tiktoken
+    from openai import AsyncOpenAI, OpenAI
+
+# Prompt de sistema com as regras de geração seguidas pelo modelo
+_SYSTEM_PROMPT = """
+Você é um assistente especializado em geração de dados sintéticos. Sua tarefa é gerar resultados no formato JSON seguindo estas regras:
+
+Formato: Responda apenas em JSON. Não inclua explicações ou comentários.
+Estrutura: Os dados devem seguir a estrutura fornecida (tabelas, colunas e relações) e respeitar constraints (e.g., NOT NULL, UNIQUE, FK).
+Relações: Mantenha consistência nas FK e nas relações entre tabelas.
+Quantidade de Dados: Gere 10 registros por tabela, salvo especificação no prompt. Respeite a coerência dos dados. Ex.: Produtos devem pertencer a departamentos válidos.
+Formato do JSON:
+Ordem: Primeiro tabelas de FK referenciadas, depois dependentes.
+Exemplo:
+{
+    "tabela": {
+        "atributos": ["coluna1", "coluna2"],
+        "valores": [
+            [v1, v2],
+            [v3, v4]
+        ]
+    }
+}
+Inconsistências: Retorne {} para solicitações inválidas ou com conflitos.
+Exemplos do Usuário: Baseie-se em exemplos fornecidos e gere dados consistentes.
+Segurança: Anonimize dados sensíveis (e.g., CPFs, e-mails) e siga regras como GDPR/LGPD.
+Plausibilidade: Gere dados realistas (e.g., sem preços negativos).
+Idioma: Gere em pt-BR, salvo solicitação contrária.
+Se as IDs são auto-increment então não devem ser geradas na resposta.
+"""
+
+# Mensagem de sistema fixa, compartilhada entre as requisições
+_SYSTEM_MESSAGE = {'role': 'system', 'content': _SYSTEM_PROMPT}
+
+# Limite de threads usadas na tokenização, em lote ou fora do event loop
+_MAX_TOKENIZER_THREADS = os.cpu_count() or 8
+
+
+@lru_cache(maxsize=None)
+def _get_encoding(model: str) -> 'tiktoken.Encoding':
+    """
+    Retorna o encoding do tiktoken para o modelo, carregando-o uma única vez.
+
+    Args:
+        model (str): Modelo OpenAI utilizado na contagem.
+
+    Returns:
+        tiktoken.Encoding: Encoding correspondente ao modelo.
+    """
+    import tiktoken
+
+    return tiktoken.encoding_for_model(model)
+
+
+@lru_cache(maxsize=1024)
+def _count_tokens(msg: str, model: str) -> int:
+    """
+    Conta os tokens de uma mensagem, memorizando mensagens repetidas.
+
+    Args:
+        msg (str): Mensagem a ser tokenizada.
+        model (str): Modelo OpenAI utilizado na contagem.
+
+    Returns:
+        int: Quantidade de tokens da mensagem.
+    """
+    return len(_get_encoding(model).encode(msg))
+
+
+@lru_cache(maxsize=None)
+def _system_prompt_tokens(model: str) -> int:
+    """
+    Retorna a quantidade de tokens do prompt de sistema, calculada uma vez por modelo.
+
+    Args:
+        model (str): Modelo OpenAI utilizado na contagem.
+
+    Returns:
+        int: Quantidade de tokens do prompt de sistema.
+
+    Raises:
+        RuntimeError: Se ocorrer um erro ao contar os tokens.
+    """
+    try:
+        return len(_get_encoding(model).encode(_SYSTEM_PROMPT))
+    except Exception as e:
+        raise RuntimeError(f'Erro inesperado contar tokens: {str(e)}')
+
+
+@lru_cache(maxsize=4)
+def _get_openai_client(api_key: str) -> 'OpenAI':
+    """
+    Retorna o cliente OpenAI do processo para a chave de API informada.
+
+    Instâncias de `Generators` com a mesma chave compartilham o cliente e seu
+    pool de conexões keep-alive, que usa HTTP/2 quando o pacote `h2` está
+    instalado.
+
+    Args:
+        api_key (str): Chave de autenticação da API da OpenAI.
+
+    Returns:
+        OpenAI: Cliente da API da OpenAI.
+    """
+    import httpx
+    from openai import DefaultHttpxClient, OpenAI
+
+    return OpenAI(
+        api_key=api_key,
+        http_client=DefaultHttpxClient(
+            http2=importlib.util.find_spec('h2') is not None,
+            limits=httpx.Limits(
+                max_keepalive_connections=50, max_connections=100
+            ),
+        ),
+    )
+
+
+@lru_cache(maxsize=None)
+def _sqlacodegen_path() -> Optional[str]:
+    """
+    Localiza o executável do sqlacodegen no PATH, buscando-o uma única vez.
+
+    Returns:
+        str | None: Caminho do executável, ou None se não estiver instalado.
+    """
+    return shutil.which('sqlacodegen')
+
+
+@dataclass(frozen=True)
+class _ModelsCacheEntry:
+    """
+    Estrutura de um banco em cache, com a contagem de tokens por modelo.
+
+    Attributes:
+        code (str): Estrutura do banco ou código gerado pelo sqlacodegen.
+        tokens_by_model (dict): Tokens de `code` já calculados, por modelo.
+    """
+
+    code: str
+    tokens_by_model: Dict[str, int] = field(default_factory=dict)
+
 
 class Generators:
+    # Threads compartilhadas para tokenizar sem bloquear o event loop; o tiktoken libera o GIL
+    _TOKENIZER_EXECUTOR = ThreadPoolExecutor(
+        max_workers=_MAX_TOKENIZER_THREADS,
+        thread_name_prefix='sdsdg-tokenizer',
+    )
+
     def __init__(
-        self, manager: DatabaseConnectionManager, OPENAI_API_KEY: str
+        self,
+        manager: DatabaseConnectionManager,
+        OPENAI_API_KEY: str,
+        cache_size: int = 0,
+        history_size: int = 128,
     ):
         """
         Inicializa os geradores de dados e define o gerenciador de conexões.
@@ -17,11 +179,78 @@ class Generators:
         Args:
             manager (DatabaseConnectionManager): Gerenciador de conexões com bancos de dados.
             OPENAI_API_KEY (str): Chave de autenticação da API da OpenAI.
+            cache_size (int): Quantidade de respostas mantidas em cache para prompts repetidos. Com 0 o cache fica desativado e cada chamada gera novos dados (default: 0).
+            history_size (int): Quantidade de gerações mantidas no histórico; as mais antigas são descartadas (default: 128).
         """
         self.manager = manager
         self.models_dir = 'SDSDG_Models'
-        self.history = {}  # Armazena o histórico de prompts e respostas
-        self.openai_client = OpenAI(api_key=OPENAI_API_KEY)
+        self._models_dir_ready: Optional[str] = None  # Pasta já criada
+        # Histórico limitado de pares (prompt, resposta), do mais antigo ao mais recente
+        self.history: 'deque[Tuple[str, str]]' = deque(maxlen=history_size)
+        self._history_count = 0  # Total de gerações, incluindo as descartadas
+        self._models_cache: Dict[Tuple[str, bool], _ModelsCacheEntry] = {}
+        self.cache_size = cache_size
+        self._result_cache: 'OrderedDict[tuple, str]' = OrderedDict()
+        self._pending_batches: Dict[str, List[str]] = {}  # Prompts por lote
+        self.openai_client = _get_openai_client(OPENAI_API_KEY)
+        self._api_key = OPENAI_API_KEY
+        self._async_client: Optional[
+            'AsyncOpenAI'
+        ] = None  # Criado no primeiro uso
+
+    @property
+    def async_client(self) -> 'AsyncOpenAI':
+        """
+        Cliente assíncrono da OpenAI, criado no primeiro uso por um método assíncrono.
+
+        Returns:
+            AsyncOpenAI: Cliente assíncrono da API da OpenAI.
+        """
+        if self._async_client is None:
+            self._async_client = self._create_async_openai_client(
+                self._api_key
+            )
+        return self._async_client
+
+    @async_client.setter
+    def async_client(self, client: Optional['AsyncOpenAI']):
+        self._async_client = client
+
+    async def aclose(self):
+        """
+        Fecha o cliente assíncrono da OpenAI e suas conexões, se tiver sido criado.
+
+        Um novo cliente é criado se um método assíncrono for chamado depois.
+        """
+        if self._async_client is not None:
+            client, self._async_client = self._async_client, None
+            await client.close()
+
+    @staticmethod
+    def _create_async_openai_client(api_key: str) -> 'AsyncOpenAI':
+        """
+        Cria o cliente assíncrono da OpenAI usado por `generate_data_async` e `generate_data_batch`.
+
+        O cliente é criado por instância, pois suas conexões ficam presas ao
+        event loop em que são usadas.
+
+        Args:
+            api_key (str): Chave de autenticação da API da OpenAI.
+
+        Returns:
+            AsyncOpenAI: Cliente assíncrono da API da OpenAI.
+        """
+        import httpx
+        from openai import AsyncOpenAI, DefaultAsyncHttpxClient
+
+        return AsyncOpenAI(
+            api_key=api_key,
+            http_client=DefaultAsyncHttpxClient(
+                limits=httpx.Limits(
+                    max_keepalive_connections=50, max_connections=100
+                ),
+            ),
+        )
 
     def generate_data(
         self,
@@ -30,6 +259,7 @@ class Generators:
         model: str = 'gpt-3.5-turbo-16k',
         max_tokens: int = 16385,
         temp: float = 0.3,
+        stream: bool = False,
     ):
         """
         Gera dados semânticos usando o modelo OpenAI com base em um prompt.
@@ -40,158 +270,880 @@ class Generators:
             model (str): Modelo OpenAI a ser utilizado (default: 'gpt-3.5-turbo').
             max_tokens (int): Número máximo de tokens permitidos na resposta (default: 4096).
             temp (float): Grau de criatividade da resposta (default: 0.3).
+            stream (bool): Retorna um iterador com a resposta em partes, como `generate_data_stream` (default: False).
+
+        Note:
+            Por padrão cada chamada pede novos dados ao modelo, mesmo com o mesmo
+            prompt. Com `cache_size > 0` na criação do `Generators`, prompts
+            repetidos para a mesma estrutura devolvem a resposta em cache; evite
+            isso quando os dados forem inseridos com `DataHandler.insert`, pois as
+            mesmas linhas seriam inseridas novamente.
 
         Returns:
-            str: Resposta gerada pelo modelo OpenAI.
+            str: Resposta gerada pelo modelo OpenAI, ou um iterador de trechos se `stream=True`.
 
         Raises:
             ValueError: Se o banco de dados não for encontrado.
             RuntimeError: Se ocorrer um erro na comunicação com a API da OpenAI.
         """
-        content = """
-Você é um assistente especializado em geração de dados sintéticos. Sua tarefa é gerar resultados no formato JSON seguindo estas regras:
+        if stream:
+            return self.generate_data_stream(
+                db_name, prompt, model, max_tokens, temp
+            )
 
-Formato: Responda apenas em JSON. Não inclua explicações ou comentários.
-Estrutura: Os dados devem seguir a estrutura fornecida (tabelas, colunas e relações) e respeitar constraints (e.g., NOT NULL, UNIQUE, FK).
-Relações: Mantenha consistência nas FK e nas relações entre tabelas.
-Quantidade de Dados: Gere 10 registros por tabela, salvo especificação no prompt. Respeite a coerência dos dados. Ex.: Produtos devem pertencer a departamentos válidos.
-Formato do JSON:
-Ordem: Primeiro tabelas de FK referenciadas, depois dependentes.
-Exemplo:
-{
-    "tabela": {
-        "atributos": ["coluna1", "coluna2"],
-        "valores": [
-            [v1, v2],
-            [v3, v4]
-        ]
-    }
-}
-Inconsistências: Retorne {} para solicitações inválidas ou com conflitos.
-Exemplos do Usuário: Baseie-se em exemplos fornecidos e gere dados consistentes.
-Segurança: Anonimize dados sensíveis (e.g., CPFs, e-mails) e siga regras como GDPR/LGPD.
-Plausibilidade: Gere dados realistas (e.g., sem preços negativos).
-Idioma: Gere em pt-BR, salvo solicitação contrária.
-Se as IDs são auto-increment então não devem ser geradas na resposta.
-"""
+        messages, res_tokens, cache_key = self._prepare_request(
+            db_name, prompt, model, max_tokens, temp
+        )
+
+        # Prompts repetidos para a mesma estrutura reutilizam a resposta
+        result = self._cached_result(cache_key)
+        if result is not None:
+            self._save_history(prompt, result)
+            return result
+
+        try:
+            # Envia o prompt para o modelo
+            response = self.openai_client.chat.completions.create(
+                model=model,
+                messages=messages,
+                max_tokens=res_tokens,
+                temperature=temp,
+            )
+
+            # Extrai o resultado da resposta
+            result = response.choices[0].message.content
+            self._save_history(prompt, result)
+            self._cache_result(cache_key, result)
+
+            return result
+
+        except Exception as e:
+            raise RuntimeError(f'Erro ao gerar dados: {str(e)}')
+
+    def generate_data_stream(
+        self,
+        db_name: str,
+        prompt: str,
+        model: str = 'gpt-3.5-turbo-16k',
+        max_tokens: int = 16385,
+        temp: float = 0.3,
+    ):
+        """
+        Gera dados como `generate_data`, entregando a resposta em partes conforme é recebida.
+
+        A validação do banco e dos tokens ocorre na chamada; a requisição só é
+        enviada ao iterar. O histórico é atualizado com a resposta completa ao
+        final do stream.
+
+        Args:
+            db_name (str): Nome do banco de dados associado à geração de dados.
+            prompt (str): Mensagem enviada ao modelo para geração de dados.
+            model (str): Modelo OpenAI a ser utilizado (default: 'gpt-3.5-turbo-16k').
+            max_tokens (int): Número máximo de tokens permitidos na resposta (default: 16385).
+            temp (float): Grau de criatividade da resposta (default: 0.3).
+
+        Returns:
+            Iterator[str]: Trechos da resposta gerada pelo modelo OpenAI.
+
+        Raises:
+            ValueError: Se o banco de dados não for encontrado ou restarem poucos tokens.
+            RuntimeError: Se ocorrer um erro na comunicação com a API da OpenAI, durante a iteração.
+        """
+        messages, res_tokens, cache_key = self._prepare_request(
+            db_name, prompt, model, max_tokens, temp
+        )
+        return self._stream_completion(
+            prompt, messages, model, res_tokens, temp, cache_key
+        )
+
+    def _stream_completion(
+        self,
+        prompt: str,
+        messages: list,
+        model: str,
+        res_tokens: int,
+        temp: float,
+        cache_key: tuple,
+    ) -> Iterator[str]:
+        """
+        Envia a requisição em modo stream e entrega os trechos da resposta.
+
+        Args:
+            prompt (str): Mensagem enviada ao modelo para geração de dados.
+            messages (list): Mensagens no formato da API da OpenAI.
+            model (str): Modelo OpenAI a ser utilizado.
+            res_tokens (int): Tokens disponíveis para a resposta.
+            temp (float): Grau de criatividade da resposta.
+            cache_key (tuple): Chave do cache de respostas.
+
+        Yields:
+            str: Trechos da resposta gerada pelo modelo OpenAI.
+
+        Raises:
+            RuntimeError: Se ocorrer um erro na comunicação com a API da OpenAI.
+        """
+        result = self._cached_result(cache_key)
+        if result is not None:
+            self._save_history(prompt, result)
+            yield result
+            return
+
+        try:
+            response = self.openai_client.chat.completions.create(
+                model=model,
+                messages=messages,
+                max_tokens=res_tokens,
+                temperature=temp,
+                stream=True,
+            )
+
+            buffer = []
+            for chunk in response:
+                delta = (
+                    chunk.choices[0].delta.content if chunk.choices else None
+                )
+                if delta:
+                    buffer.append(delta)
+                    yield delta
+
+            result = ''.join(buffer)
+            self._save_history(prompt, result)
+            self._cache_result(cache_key, result)
+
+        except Exception as e:
+            raise RuntimeError(f'Erro ao gerar dados: {str(e)}')
+
+    async def generate_data_async(
+        self,
+        db_name: str,
+        prompt: str,
+        model: str = 'gpt-3.5-turbo-16k',
+        max_tokens: int = 16385,
+        temp: float = 0.3,
+    ):
+        """
+        Versão assíncrona de `generate_data`.
+
+        A geração da estrutura do banco e a contagem de tokens do prompt de
+        sistema são executadas em paralelo, e a requisição usa o cliente
+        assíncrono da OpenAI, sem bloquear o event loop.
+
+        Args:
+            db_name (str): Nome do banco de dados associado à geração de dados.
+            prompt (str): Mensagem enviada ao modelo para geração de dados.
+            model (str): Modelo OpenAI a ser utilizado (default: 'gpt-3.5-turbo-16k').
+            max_tokens (int): Número máximo de tokens permitidos na resposta (default: 16385).
+            temp (float): Grau de criatividade da resposta (default: 0.3).
+
+        Returns:
+            str: Resposta gerada pelo modelo OpenAI.
+
+        Raises:
+            ValueError: Se o banco de dados não for encontrado.
+            RuntimeError: Se ocorrer um erro na comunicação com a API da OpenAI.
+        """
         if db_name not in self.manager.connections:
             raise ValueError(
                 f"O banco de dados '{db_name}' não foi encontrado no gerenciador."
             )
 
-        database_structure = self.generate_models(db_name)
+        database_structure, content_tokens = await asyncio.gather(
+            self.generate_models_async(db_name),
+            asyncio.get_running_loop().run_in_executor(
+                self._TOKENIZER_EXECUTOR, _system_prompt_tokens, model
+            ),
+        )
 
-        database_structure_tokens = self.count_tokens(
-            database_structure, model
+        return await self._complete_async(
+            db_name,
+            database_structure,
+            content_tokens,
+            prompt,
+            model,
+            max_tokens,
+            temp,
         )
-        content_tokens = self.count_tokens(content, model)
-        prompt_tokens = self.count_tokens(prompt, model)
-        res_tokens = (
-            max_tokens
-            - (database_structure_tokens + content_tokens + prompt_tokens)
-            - 40
-        )   # Overhead
 
-        if res_tokens < 1000:
+    async def generate_data_batch(
+        self,
+        db_name: str,
+        prompts: List[str],
+        model: str = 'gpt-3.5-turbo-16k',
+        max_tokens: int = 16385,
+        temp: float = 0.3,
+        max_concurrency: int = 5,
+    ) -> List[str]:
+        """
+        Gera dados para vários prompts em paralelo usando o cliente assíncrono da OpenAI.
+
+        A estrutura do banco é obtida uma única vez e compartilhada entre os prompts.
+
+        Args:
+            db_name (str): Nome do banco de dados associado à geração de dados.
+            prompts (list): Mensagens enviadas ao modelo para geração de dados.
+            model (str): Modelo OpenAI a ser utilizado (default: 'gpt-3.5-turbo-16k').
+            max_tokens (int): Número máximo de tokens permitidos na resposta (default: 16385).
+            temp (float): Grau de criatividade da resposta (default: 0.3).
+            max_concurrency (int): Requisições simultâneas permitidas, respeitando o limite da API (default: 5).
+
+        Returns:
+            list: Respostas geradas pelo modelo OpenAI, na ordem dos prompts.
+
+        Raises:
+            ValueError: Se o banco de dados não for encontrado.
+            RuntimeError: Se ocorrer um erro na comunicação com a API da OpenAI.
+        """
+        if db_name not in self.manager.connections:
             raise ValueError(
-                f'Quantidade de tokens restantes menor que o mínimo de 1000: tokens restantes = {res_tokens}'
+                f"O banco de dados '{db_name}' não foi encontrado no gerenciador."
+            )
+
+        database_structure, content_tokens = await asyncio.gather(
+            self.generate_models_async(db_name),
+            asyncio.get_running_loop().run_in_executor(
+                self._TOKENIZER_EXECUTOR, _system_prompt_tokens, model
+            ),
+        )
+        semaphore = asyncio.Semaphore(max_concurrency)
+
+        async def complete(prompt: str) -> str:
+            async with semaphore:
+                return await self._complete_async(
+                    db_name,
+                    database_structure,
+                    content_tokens,
+                    prompt,
+                    model,
+                    max_tokens,
+                    temp,
+                )
+
+        return list(await asyncio.gather(*(complete(p) for p in prompts)))
+
+    def generate_data_batch_offline(
+        self,
+        db_name: str,
+        prompts: List[str],
+        model: str = 'gpt-3.5-turbo-16k',
+        max_tokens: int = 16385,
+        temp: float = 0.3,
+    ) -> str:
+        """
+        Envia vários prompts para processamento assíncrono pela Batch API da OpenAI.
+
+        Indicado para gerações em massa sem urgência: o lote é processado em
+        até 24 horas com custo de tokens reduzido e sem consumir o limite de
+        requisições por minuto. O resultado é obtido com `poll_batch`.
+
+        Args:
+            db_name (str): Nome do banco de dados associado à geração de dados.
+            prompts (list): Mensagens enviadas ao modelo para geração de dados.
+            model (str): Modelo OpenAI a ser utilizado (default: 'gpt-3.5-turbo-16k').
+            max_tokens (int): Número máximo de tokens permitidos na resposta (default: 16385).
+            temp (float): Grau de criatividade da resposta (default: 0.3).
+
+        Returns:
+            str: ID do lote criado na OpenAI.
+
+        Raises:
+            ValueError: Se o banco de dados não for encontrado ou restarem poucos tokens.
+            RuntimeError: Se ocorrer um erro na comunicação com a API da OpenAI.
+        """
+        if db_name not in self.manager.connections:
+            raise ValueError(
+                f"O banco de dados '{db_name}' não foi encontrado no gerenciador."
             )
+
+        database_structure = self.generate_models(db_name)
+        content_tokens = _system_prompt_tokens(model)
+        database_structure_tokens = self._structure_tokens(
+            db_name, database_structure, model
+        )
+        prompts_tokens = self.count_tokens_batch(prompts, model)
+
+        # Uma requisição por linha no formato JSONL esperado pela Batch API
+        lines = []
+        for index, (prompt, prompt_tokens) in enumerate(
+            zip(prompts, prompts_tokens)
+        ):
+            request = {
+                'custom_id': f'request-{index}',
+                'method': 'POST',
+                'url': '/v1/chat/completions',
+                'body': {
+                    'model': model,
+                    'messages': self._build_messages(
+                        database_structure, prompt
+                    ),
+                    'max_tokens': self._response_tokens(
+                        max_tokens,
+                        database_structure_tokens,
+                        content_tokens,
+                        prompt_tokens,
+                    ),
+                    'temperature': temp,
+                },
+            }
+            lines.append(json.dumps(request, ensure_ascii=False))
+
         try:
-            # Envia o prompt para o modelo
-            response = self.openai_client.chat.completions.create(
+            input_file = self.openai_client.files.create(
+                file=(
+                    f'{db_name}_batch.jsonl',
+                    '\n'.join(lines).encode('utf-8'),
+                ),
+                purpose='batch',
+            )
+            batch = self.openai_client.batches.create(
+                input_file_id=input_file.id,
+                endpoint='/v1/chat/completions',
+                completion_window='24h',
+            )
+        except Exception as e:
+            raise RuntimeError(f'Erro ao criar lote: {str(e)}')
+
+        self._pending_batches[batch.id] = list(prompts)
+        return batch.id
+
+    def poll_batch(self, batch_id: str) -> Optional[List[Optional[str]]]:
+        """
+        Consulta um lote criado por `generate_data_batch_offline`.
+
+        Quando o lote é concluído, as respostas são baixadas e salvas no histórico.
+
+        Args:
+            batch_id (str): ID do lote retornado por `generate_data_batch_offline`.
+
+        Returns:
+            list | None: Respostas na ordem dos prompts, com None para requisições
+            que falharam, ou None se o lote ainda estiver em processamento.
+
+        Raises:
+            RuntimeError: Se o lote falhar, expirar ou for cancelado, ou se ocorrer
+            um erro na comunicação com a API da OpenAI.
+        """
+        try:
+            batch = self.openai_client.batches.retrieve(batch_id)
+        except Exception as e:
+            raise RuntimeError(f'Erro ao consultar lote: {str(e)}')
+
+        if batch.status in ('failed', 'expired', 'cancelled'):
+            raise RuntimeError(
+                f"Lote '{batch_id}' finalizado com status '{batch.status}'."
+            )
+        if batch.status != 'completed':
+            return None
+
+        prompts = self._pending_batches.get(batch_id)
+        results: Dict[int, str] = {}
+        if batch.output_file_id:
+            try:
+                content = self.openai_client.files.content(
+                    batch.output_file_id
+                ).text
+            except Exception as e:
+                raise RuntimeError(
+                    f'Erro ao baixar resultado do lote: {str(e)}'
+                )
+
+            for line in content.splitlines():
+                if not line.strip():
+                    continue
+                item = json.loads(line)
+                response = item.get('response') or {}
+                if response.get('status_code') != 200:
+                    continue
+                index = int(item['custom_id'].rsplit('-', 1)[1])
+                results[index] = response['body']['choices'][0]['message'][
+                    'content'
+                ]
+
+        size = (
+            len(prompts) if prompts is not None else batch.request_counts.total
+        )
+        ordered = [results.get(index) for index in range(size)]
+        if prompts is not None:
+            del self._pending_batches[batch_id]
+            for prompt, result in zip(prompts, ordered):
+                if result is not None:
+                    self._save_history(prompt, result)
+        return ordered
+
+    async def _complete_async(
+        self,
+        db_name: str,
+        database_structure: str,
+        content_tokens: int,
+        prompt: str,
+        model: str,
+        max_tokens: int,
+        temp: float,
+    ) -> str:
+        """
+        Envia um prompt ao cliente assíncrono da OpenAI com a estrutura já obtida.
+
+        Args:
+            db_name (str): Nome do banco de dados associado à geração de dados.
+            database_structure (str): Estrutura do banco de dados enviada ao modelo.
+            content_tokens (int): Tokens do prompt de sistema.
+            prompt (str): Mensagem enviada ao modelo para geração de dados.
+            model (str): Modelo OpenAI a ser utilizado.
+            max_tokens (int): Número máximo de tokens permitidos.
+            temp (float): Grau de criatividade da resposta.
+
+        Returns:
+            str: Resposta gerada pelo modelo OpenAI.
+
+        Raises:
+            RuntimeError: Se ocorrer um erro na comunicação com a API da OpenAI.
+        """
+        # A tokenização roda no pool compartilhado enquanto outras requisições aguardam a API
+        (
+            structure_tokens,
+            prompt_tokens,
+        ) = await asyncio.get_running_loop().run_in_executor(
+            self._TOKENIZER_EXECUTOR,
+            self._request_tokens,
+            db_name,
+            database_structure,
+            prompt,
+            model,
+        )
+        res_tokens = self._response_tokens(
+            max_tokens, structure_tokens, content_tokens, prompt_tokens
+        )
+
+        cache_key = self._result_cache_key(
+            db_name, database_structure, prompt, model, max_tokens, temp
+        )
+        result = self._cached_result(cache_key)
+        if result is not None:
+            self._save_history(prompt, result)
+            return result
+
+        try:
+            # Envia o prompt para o modelo sem bloquear o event loop
+            response = await self.async_client.chat.completions.create(
                 model=model,
-                messages=[
-                    {
-                        'role': 'system',  # Prompt para o modelo seguir as regras e entregar a melhor resposta no formato adequado
-                        'content': content,
-                    },
-                    {
-                        'role': 'system',
-                        'content': database_structure,
-                    },  # Estrutura do banco de dados solicitado
-                    {'role': 'user', 'content': prompt},  # Prompt do usuário
-                ],
+                messages=self._build_messages(database_structure, prompt),
                 max_tokens=res_tokens,
                 temperature=temp,
             )
 
-            # Extrai o resultado da resposta
             result = response.choices[0].message.content
-
-            # Salva no histórico
-            gen_key = f'gen{len(self.history) + 1}'
-            self.history[gen_key] = {'prompt': prompt, 'result': result}
+            self._save_history(prompt, result)
+            self._cache_result(cache_key, result)
 
             return result
 
         except Exception as e:
             raise RuntimeError(f'Erro ao gerar dados: {str(e)}')
 
-    def generate_models(self, db_name: str, save_to_file: bool = False):
+    async def generate_models_async(
+        self,
+        db_name: str,
+        save_to_file: bool = False,
+        refresh: bool = False,
+        use_sqlacodegen: bool = False,
+    ):
         """
-        Gera os modelos SQLAlchemy do banco de dados especificado.
+        Versão assíncrona de `generate_models`, executada em uma thread separada.
 
         Args:
             db_name (str): Nome do banco de dados a ser utilizado.
             save_to_file (bool): Indica se o código gerado deve ser salvo em arquivo. Default é False.
+            refresh (bool): Ignora o cache e gera os modelos novamente. Default é False.
+            use_sqlacodegen (bool): Gera os modelos com o sqlacodegen. Default é False.
 
         Returns:
-            str: Código gerado pelo sqlacodegen.
+            str: Estrutura do banco ou código gerado pelo sqlacodegen.
+        """
+        return await asyncio.to_thread(
+            self.generate_models,
+            db_name,
+            save_to_file,
+            refresh,
+            use_sqlacodegen,
+        )
+
+    def _prepare_request(
+        self,
+        db_name: str,
+        prompt: str,
+        model: str,
+        max_tokens: int,
+        temp: float,
+    ) -> Tuple[list, int, tuple]:
+        """
+        Monta as mensagens enviadas ao modelo e calcula os tokens da resposta.
+
+        Args:
+            db_name (str): Nome do banco de dados associado à geração de dados.
+            prompt (str): Mensagem enviada ao modelo para geração de dados.
+            model (str): Modelo OpenAI a ser utilizado.
+            max_tokens (int): Número máximo de tokens permitidos.
+            temp (float): Grau de criatividade da resposta.
+
+        Returns:
+            tuple: Mensagens no formato da API da OpenAI, tokens disponíveis para a resposta e chave do cache de respostas.
 
         Raises:
-            ValueError: Se o banco de dados não for encontrado.
-            RuntimeError: Se ocorrer um erro ao gerar os modelos.
+            ValueError: Se o banco de dados não for encontrado ou restarem poucos tokens.
         """
         if db_name not in self.manager.connections:
             raise ValueError(
                 f"O banco de dados '{db_name}' não foi encontrado no gerenciador."
             )
 
-        db_config = self.manager.get_config_by_name(db_name)
-        db_url = self.manager.build_connection_url(db_config)
+        database_structure = self.generate_models(db_name)
 
-        try:
-            # Verifica se o sqlacodegen está instalado
-            result = subprocess.run(
-                ['sqlacodegen', '--help'], capture_output=True, text=True
+        res_tokens = self._response_tokens(
+            max_tokens,
+            _system_prompt_tokens(model),
+            *self._request_tokens(db_name, database_structure, prompt, model),
+        )
+
+        return (
+            self._build_messages(database_structure, prompt),
+            res_tokens,
+            self._result_cache_key(
+                db_name, database_structure, prompt, model, max_tokens, temp
+            ),
+        )
+
+    @staticmethod
+    def _build_messages(database_structure: str, prompt: str):
+        """
+        Monta a lista de mensagens enviada ao modelo.
+
+        Args:
+            database_structure (str): Estrutura do banco de dados solicitado.
+            prompt (str): Prompt do usuário.
+
+        Returns:
+            list: Mensagens no formato esperado pela API da OpenAI.
+        """
+        return [
+            _SYSTEM_MESSAGE,  # Prompt para o modelo seguir as regras e entregar a melhor resposta no formato adequado
+            {
+                'role': 'system',
+                'content': database_structure,
+            },  # Estrutura do banco de dados solicitado
+            {'role': 'user', 'content': prompt},  # Prompt do usuário
+        ]
+
+    @staticmethod
+    def _response_tokens(max_tokens: int, *used_tokens: int) -> int:
+        """
+        Calcula quantos tokens restam para a resposta do modelo.
+
+        Args:
+            max_tokens (int): Número máximo de tokens do modelo.
+            *used_tokens (int): Tokens já consumidos pelas mensagens enviadas.
+
+        Returns:
+            int: Tokens disponíveis para a resposta.
+
+        Raises:
+            ValueError: Se restarem menos de 1000 tokens para a resposta.
+        """
+        res_tokens = max_tokens - sum(used_tokens) - 40   # Overhead
+
+        if res_tokens < 1000:
+            raise ValueError(
+                f'Quantidade de tokens restantes menor que o mínimo de 1000: tokens restantes = {res_tokens}'
             )
-            if result.returncode != 0:
-                raise EnvironmentError('sqlacodegen não está instalado.')
+        return res_tokens
+
+    def _request_tokens(
+        self, db_name: str, database_structure: str, prompt: str, model: str
+    ) -> Tuple[int, int]:
+        """
+        Conta os tokens da estrutura do banco e do prompt de uma requisição.
+
+        Args:
+            db_name (str): Nome do banco de dados associado à estrutura.
+            database_structure (str): Estrutura do banco de dados enviada ao modelo.
+            prompt (str): Mensagem enviada ao modelo para geração de dados.
+            model (str): Modelo OpenAI utilizado na contagem.
+
+        Returns:
+            tuple: Tokens da estrutura do banco e tokens do prompt.
+        """
+        return (
+            self._structure_tokens(db_name, database_structure, model),
+            self.count_tokens(prompt, model),
+        )
+
+    def _structure_tokens(
+        self, db_name: str, database_structure: str, model: str
+    ) -> int:
+        """
+        Conta os tokens da estrutura do banco, reaproveitando a contagem em cache.
+
+        A contagem fica na entrada de `_models_cache` do banco e é feita uma
+        única vez por modelo enquanto a estrutura não mudar.
+
+        Args:
+            db_name (str): Nome do banco de dados associado à estrutura.
+            database_structure (str): Estrutura do banco de dados enviada ao modelo.
+            model (str): Modelo OpenAI utilizado na contagem.
+
+        Returns:
+            int: Quantidade de tokens da estrutura do banco.
+        """
+        entry = self._models_cache.get((db_name, False))
+        if entry is None or entry.code != database_structure:
+            return self.count_tokens(database_structure, model)
+
+        tokens = entry.tokens_by_model.get(model)
+        if tokens is None:
+            tokens = self.count_tokens(entry.code, model)
+            entry.tokens_by_model[model] = tokens
+        return tokens
+
+    @staticmethod
+    def _result_cache_key(
+        db_name: str,
+        database_structure: str,
+        prompt: str,
+        model: str,
+        max_tokens: int,
+        temp: float,
+    ) -> tuple:
+        """
+        Monta a chave do cache de respostas a partir dos parâmetros da geração.
+
+        A estrutura do banco entra como hash, para que mudanças no schema
+        invalidem as respostas anteriores.
+
+        Args:
+            db_name (str): Nome do banco de dados associado à geração de dados.
+            database_structure (str): Estrutura do banco de dados enviada ao modelo.
+            prompt (str): Mensagem enviada ao modelo para geração de dados.
+            model (str): Modelo OpenAI a ser utilizado.
+            max_tokens (int): Número máximo de tokens permitidos.
+            temp (float): Grau de criatividade da resposta.
+
+        Returns:
+            tuple: Chave do cache de respostas.
+        """
+        schema_hash = hashlib.blake2b(
+            database_structure.encode(), digest_size=16
+        ).hexdigest()
+        return (db_name, schema_hash, prompt, model, max_tokens, temp)
+
+    def _cached_result(self, key: tuple) -> Optional[str]:
+        """
+        Busca uma resposta no cache, marcando-a como usada recentemente.
+
+        Args:
+            key (tuple): Chave do cache de respostas.
+
+        Returns:
+            str | None: Resposta em cache, ou None se não houver.
+        """
+        result = self._result_cache.get(key)
+        if result is not None:
+            self._result_cache.move_to_end(key)
+        return result
+
+    def _cache_result(self, key: tuple, result: str):
+        """
+        Armazena uma resposta no cache, descartando a mais antiga se estiver cheio.
+
+        Args:
+            key (tuple): Chave do cache de respostas.
+            result (str): Resposta gerada pelo modelo.
+        """
+        if self.cache_size <= 0:
+            return
+        self._result_cache[key] = result
+        self._result_cache.move_to_end(key)
+        while len(self._result_cache) > self.cache_size:
+            self._result_cache.popitem(last=False)
+
+    def cache_clear(self):
+        """
+        Limpa o cache de respostas de prompts repetidos.
+        """
+        self._result_cache.clear()
+
+    def _save_history(self, prompt: str, result: str):
+        """
+        Salva um prompt e sua resposta no histórico.
+
+        Args:
+            prompt (str): Prompt enviado ao modelo.
+            result (str): Resposta gerada pelo modelo.
+        """
+        self.history.append((prompt, result))
+        self._history_count += 1
+
+    def history_as_dict(self) -> Dict[str, Dict[str, str]]:
+        """
+        Retorna o histórico no formato de dicionário `{'genN': {'prompt', 'result'}}`.
+
+        A numeração considera todas as gerações, inclusive as já descartadas
+        do histórico.
 
-            # Gera os modelos do banco
-            result = subprocess.run(
-                ['sqlacodegen', db_url],
-                capture_output=True,
-                text=True,
-                check=True,
+        Returns:
+            dict: Prompts e respostas indexados pela ordem de geração.
+        """
+        first = self._history_count - len(self.history) + 1
+        return {
+            f'gen{index}': {'prompt': prompt, 'result': result}
+            for index, (prompt, result) in enumerate(self.history, first)
+        }
+
+    def generate_models(
+        self,
+        db_name: str,
+        save_to_file: bool = False,
+        refresh: bool = False,
+        use_sqlacodegen: bool = False,
+    ):
+        """
+        Gera a estrutura do banco de dados especificado.
+
+        Por padrão a estrutura é obtida por reflexão do SQLAlchemy no próprio
+        processo, em um formato compacto enviado ao modelo. Com
+        `use_sqlacodegen=True`, gera os modelos SQLAlchemy através do sqlacodegen.
+        O resultado fica em cache por banco; chamadas seguintes reutilizam o
+        resultado sem consultar o banco novamente até `refresh=True` ou
+        `clear_models_cache`.
+
+        Args:
+            db_name (str): Nome do banco de dados a ser utilizado.
+            save_to_file (bool): Indica se o código gerado deve ser salvo em arquivo. Default é False.
+            refresh (bool): Ignora o cache e gera os modelos novamente. Default é False.
+            use_sqlacodegen (bool): Gera os modelos com o sqlacodegen. Default é False.
+
+        Returns:
+            str: Estrutura do banco ou código gerado pelo sqlacodegen.
+
+        Raises:
+            ValueError: Se o banco de dados não for encontrado.
+            RuntimeError: Se ocorrer um erro ao gerar os modelos.
+        """
+        if db_name not in self.manager.connections:
+            raise ValueError(
+                f"O banco de dados '{db_name}' não foi encontrado no gerenciador."
             )
-            code = result.stdout  # Código gerado em memória
+
+        db_url = self.manager.connections[db_name]['url']
+
+        try:
+            cache_key = (db_name, use_sqlacodegen)
+            entry = None if refresh else self._models_cache.get(cache_key)
+            if entry is None:
+                if use_sqlacodegen:
+                    code = self._run_sqlacodegen(db_url)
+                else:
+                    code = self.manager.describe_schema(
+                        db_name, refresh=refresh
+                    )
+                entry = _ModelsCacheEntry(code)
+                self._models_cache[cache_key] = entry
+            code = entry.code
 
             # Salva em arquivo, se solicitado
             if save_to_file:
-                os.makedirs(
-                    self.models_dir, exist_ok=True
-                )  # Garante que a pasta models exista
-                output_path = (
-                    f'{self.models_dir}/{db_name}.py'  # Nome do arquivo
-                )
-                with open(output_path, 'w') as f:
-                    f.write(code)
+                # Garante que a pasta models exista, verificando uma única vez
+                if self._models_dir_ready != self.models_dir:
+                    Path(self.models_dir).mkdir(parents=True, exist_ok=True)
+                    self._models_dir_ready = self.models_dir
+                extension = 'py' if use_sqlacodegen else 'txt'
+                output_path = f'{self.models_dir}/{db_name}.{extension}'  # Nome do arquivo
+                Path(output_path).write_text(code, encoding='utf-8')
                 print(f'Modelos salvos em: {output_path}')
 
             return code
 
         except subprocess.CalledProcessError as e:
             raise RuntimeError(
-                f"Erro ao gerar models para '{db_name}': {e.stderr}"
+                f"Erro ao gerar models para '{db_name}': "
+                f"{e.stderr.decode('utf-8', errors='replace')}"
             )
         except Exception as e:
             raise RuntimeError(f'Erro inesperado ao gerar models: {str(e)}')
 
+    def clear_models_cache(self, db_name: Optional[str] = None):
+        """
+        Descarta a estrutura em cache, por exemplo após alterações de DDL no banco.
+
+        Args:
+            db_name (str | None): Banco a ser descartado. Se None, descarta todos.
+        """
+        for key in list(self._models_cache):
+            if db_name is None or key[0] == db_name:
+                del self._models_cache[key]
+
+        # Descarta também as tabelas refletidas pelo gerenciador
+        for name, connection in self.manager.connections.items():
+            if db_name is None or name == db_name:
+                connection.pop('metadata', None)
+
     @staticmethod
-    def count_tokens(msg: str, model: str = 'gpt-3.5-turbo-16k'):
+    def _run_sqlacodegen(db_url: str) -> str:
+        """
+        Executa o sqlacodegen para gerar os modelos SQLAlchemy do banco.
+
+        Args:
+            db_url (str): URL de conexão com o banco de dados.
+
+        Returns:
+            str: Código gerado pelo sqlacodegen.
+
+        Raises:
+            EnvironmentError: Se o sqlacodegen não estiver instalado.
+            subprocess.CalledProcessError: Se o sqlacodegen falhar.
+        """
+        # Verifica se o sqlacodegen está instalado
+        sqlacodegen_path = _sqlacodegen_path()
+        if sqlacodegen_path is None:
+            raise EnvironmentError('sqlacodegen não está instalado.')
+
+        # Gera os modelos do banco
+        result = subprocess.run(
+            [sqlacodegen_path, db_url],
+            capture_output=True,
+            check=True,
+        )
+        # Decodifica a saída de uma só vez, sem a camada de texto do subprocess
+        return result.stdout.decode('utf-8')  # Código gerado em memória
+
+    @classmethod
+    def count_tokens(cls, msg: str, model: str = 'gpt-3.5-turbo-16k'):
+        try:
+            return _count_tokens(msg, model)
+        except Exception as e:
+            raise RuntimeError(f'Erro inesperado contar tokens: {str(e)}')
+
+    @classmethod
+    def count_tokens_batch(
+        cls, msgs: List[str], model: str = 'gpt-3.5-turbo-16k'
+    ) -> List[int]:
+        """
+        Conta os tokens de várias mensagens em uma única chamada ao tiktoken.
+
+        Args:
+            msgs (list): Mensagens a serem tokenizadas.
+            model (str): Modelo OpenAI utilizado na contagem (default: 'gpt-3.5-turbo-16k').
+
+        Returns:
+            list: Quantidade de tokens de cada mensagem, na mesma ordem.
+
+        Raises:
+            RuntimeError: Se ocorrer um erro ao contar os tokens.
+        """
         try:
-            encoding = tiktoken.encoding_for_model(model)   # Inicia o tiktoken
-            return len(encoding.encode(msg))
+            # Até uma thread por mensagem, limitado pelos núcleos disponíveis;
+            # o tiktoken libera o GIL durante o encode
+            tokens = _get_encoding(model).encode_batch(
+                msgs,
+                num_threads=max(min(len(msgs), _MAX_TOKENIZER_THREADS), 1),
+            )
+            return [len(t) for t in tokens]
         except Exception as e:
             raise RuntimeError(f'Erro inesperado contar tokens: {str(e)}')
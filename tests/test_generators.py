@@ -0,0 +1,541 @@
+import asyncio
+import json
+import subprocess
+import sys
+import threading
+from collections import deque
+from pathlib import Path
+from unittest.mock import AsyncMock, MagicMock, patch
+
+import pytest
+from sqlalchemy import text
+
+import sdsdg_lib.generators
+from sdsdg_lib import DatabaseConnectionManager, Generators
+from sdsdg_lib.generators import (
+    _SYSTEM_MESSAGE,
+    _SYSTEM_PROMPT,
+    _count_tokens,
+    _get_encoding,
+    _get_openai_client,
+    _sqlacodegen_path,
+    _system_prompt_tokens,
+)
+
+# Implementação original, antes de a fixture simular a contagem de tokens
+_COUNT_TOKENS = Generators.__dict__['count_tokens']
+_COUNT_TOKENS_BATCH = Generators.__dict__['count_tokens_batch']
+
+
+@pytest.fixture
+def generator(monkeypatch):
+    """Fixture com um gerador ligado a um banco SQLite e cliente OpenAI simulado."""
+    monkeypatch.setattr(Generators, 'count_tokens', MagicMock(return_value=10))
+    monkeypatch.setattr(
+        Generators,
+        'count_tokens_batch',
+        MagicMock(side_effect=lambda msgs, model: [10] * len(msgs)),
+    )
+    encoding = MagicMock()
+    encoding.encode.return_value = [0] * 10
+    monkeypatch.setattr(
+        'sdsdg_lib.generators._get_encoding', MagicMock(return_value=encoding)
+    )
+    _system_prompt_tokens.cache_clear()
+    manager = DatabaseConnectionManager(
+        [{'name': 'test_db', 'dialect': 'sqlite', 'database': ':memory:'}]
+    )
+    generator = Generators(manager, OPENAI_API_KEY='test-key')
+    generator.openai_client = MagicMock()
+    response = generator.openai_client.chat.completions.create.return_value
+    response.choices[0].message.content = '{}'
+    generator.async_client = MagicMock()
+    generator.async_client.chat.completions.create = AsyncMock(
+        return_value=response
+    )
+    yield generator
+    _system_prompt_tokens.cache_clear()
+
+
+def test_generate_data_saves_history(generator):
+    """Testa se a resposta do modelo é retornada e salva no histórico."""
+    with patch.object(generator, 'generate_models', return_value='schema'):
+        result = generator.generate_data('test_db', 'Gere 5 clientes')
+
+    assert result == '{}'
+    assert list(generator.history) == [('Gere 5 clientes', '{}')]
+    assert generator.history_as_dict() == {
+        'gen1': {'prompt': 'Gere 5 clientes', 'result': '{}'}
+    }
+
+
+def test_history_is_bounded(generator):
+    """Testa se o histórico descarta as gerações mais antigas ao atingir o limite."""
+    bounded = Generators(generator.manager, 'test-key', history_size=2)
+    assert bounded.history.maxlen == 2
+
+    generator.history = deque(maxlen=2)
+    with patch.object(generator, 'generate_models', return_value='schema'):
+        for prompt in ['Gere 1', 'Gere 2', 'Gere 3']:
+            generator.generate_data('test_db', prompt)
+
+    assert [prompt for prompt, _ in generator.history] == ['Gere 2', 'Gere 3']
+    assert list(generator.history_as_dict()) == ['gen2', 'gen3']
+
+
+def test_generate_data_async(generator):
+    """Testa se a versão assíncrona produz o mesmo resultado."""
+    with patch.object(generator, 'generate_models', return_value='schema'):
+        result = asyncio.run(
+            generator.generate_data_async('test_db', 'Gere 5 clientes')
+        )
+
+    assert result == '{}'
+    generator.openai_client.chat.completions.create.assert_not_called()
+    messages = generator.async_client.chat.completions.create.call_args[1][
+        'messages'
+    ]
+    assert messages[1]['content'] == 'schema'
+
+
+def test_generate_data_invalid_db(generator):
+    """Testa se uma exceção é levantada para um banco inexistente."""
+    with pytest.raises(ValueError, match="'invalid_db' não foi encontrado"):
+        generator.generate_data('invalid_db', 'Gere 5 clientes')
+
+
+def test_generate_models_uses_cache(generator):
+    """Testa se o sqlacodegen é executado apenas uma vez por banco."""
+    completed = MagicMock(returncode=0, stdout=b'class Tabela: ...')
+    with patch(
+        'sdsdg_lib.generators._sqlacodegen_path',
+        return_value='/usr/bin/sqlacodegen',
+    ), patch('subprocess.run', return_value=completed) as run:
+        first = generator.generate_models('test_db', use_sqlacodegen=True)
+        second = generator.generate_models('test_db', use_sqlacodegen=True)
+
+        assert first == second == 'class Tabela: ...'
+        run.assert_called_once()
+        assert run.call_args[0][0] == [
+            '/usr/bin/sqlacodegen',
+            'sqlite:///:memory:',
+        ]
+
+        generator.generate_models(
+            'test_db', refresh=True, use_sqlacodegen=True
+        )
+        assert run.call_count == 2
+
+        run.side_effect = subprocess.CalledProcessError(
+            1, 'sqlacodegen', stderr='Tabela inválida'.encode('utf-8')
+        )
+        with pytest.raises(RuntimeError, match="'test_db': Tabela inválida"):
+            generator.generate_models(
+                'test_db', refresh=True, use_sqlacodegen=True
+            )
+
+
+def test_generate_models_without_sqlacodegen(generator):
+    """Testa o erro quando o sqlacodegen não está instalado."""
+    with patch('sdsdg_lib.generators._sqlacodegen_path', return_value=None):
+        with pytest.raises(
+            RuntimeError, match='sqlacodegen não está instalado'
+        ):
+            generator.generate_models('test_db', use_sqlacodegen=True)
+
+
+def test_generate_models_describes_schema(generator):
+    """Testa se a estrutura do banco é obtida por reflexão, sem subprocessos."""
+    with generator.manager.get_engine('test_db').begin() as connection:
+        connection.execute(
+            text('CREATE TABLE departamento (id INTEGER PRIMARY KEY)')
+        )
+        connection.execute(
+            text(
+                'CREATE TABLE produto (id INTEGER PRIMARY KEY, '
+                'departamento_id INTEGER REFERENCES departamento(id))'
+            )
+        )
+
+    with patch('subprocess.run') as run:
+        structure = generator.generate_models('test_db')
+
+    run.assert_not_called()
+    assert structure == (
+        'departamento(id:INTEGER PK AUTOINCREMENT)\n'
+        'produto(id:INTEGER PK AUTOINCREMENT, departamento_id:INTEGER) '
+        'FKs: departamento_id->departamento.id'
+    )
+
+
+def test_count_tokens_caches_encoding():
+    """Testa se o encoding é carregado uma vez e mensagens repetidas são memorizadas."""
+    encoding = MagicMock()
+    encoding.encode.return_value = [1, 2, 3]
+    _get_encoding.cache_clear()
+    _count_tokens.cache_clear()
+    with patch(
+        'tiktoken.encoding_for_model', return_value=encoding
+    ) as encoding_for_model:
+        assert Generators.count_tokens('abc', 'gpt-4') == 3
+        assert Generators.count_tokens('def', 'gpt-4') == 3
+        assert Generators.count_tokens('abc', 'gpt-4') == 3
+    _get_encoding.cache_clear()
+    _count_tokens.cache_clear()
+
+    encoding_for_model.assert_called_once_with('gpt-4')
+    assert encoding.encode.call_count == 2
+
+
+def test_system_prompt_tokens_counted_once(generator):
+    """Testa se o prompt de sistema é tokenizado uma única vez por modelo."""
+    with patch.object(generator, 'generate_models', return_value='schema'):
+        generator.generate_data('test_db', 'Gere 5 clientes')
+        generator.generate_data('test_db', 'Gere 5 produtos')
+
+    encoding = sdsdg_lib.generators._get_encoding('gpt-3.5-turbo-16k')
+    encoding.encode.assert_called_once_with(_SYSTEM_PROMPT)
+
+
+def test_structure_tokens_wraps_errors(generator, monkeypatch):
+    """Testa se falhas do tiktoken na estrutura em cache viram RuntimeError."""
+    monkeypatch.setattr(Generators, 'count_tokens', _COUNT_TOKENS)
+    generator.generate_models('test_db')
+    sdsdg_lib.generators._get_encoding.side_effect = KeyError('modelo-x')
+
+    with pytest.raises(RuntimeError, match='Erro inesperado contar tokens'):
+        generator._structure_tokens(
+            'test_db', generator.generate_models('test_db'), 'modelo-x'
+        )
+
+
+def test_system_prompt_tokens_wraps_errors(generator):
+    """Testa se falhas do tiktoken no prompt de sistema viram RuntimeError."""
+    sdsdg_lib.generators._get_encoding.side_effect = KeyError('modelo-x')
+
+    with patch.object(generator, 'generate_models', return_value='schema'):
+        with pytest.raises(
+            RuntimeError, match='Erro inesperado contar tokens'
+        ):
+            generator.generate_data('test_db', 'Gere dados', model='modelo-x')
+
+
+def test_generate_data_stream(generator):
+    """Testa se a resposta é entregue em partes e salva completa no histórico."""
+    chunks = []
+    for text_part in ['{"tabela"', ': {}', None, '}']:
+        chunk = MagicMock()
+        chunk.choices[0].delta.content = text_part
+        chunks.append(chunk)
+    generator.openai_client.chat.completions.create.return_value = iter(chunks)
+
+    with patch.object(generator, 'generate_models', return_value='schema'):
+        parts = list(
+            generator.generate_data('test_db', 'Gere dados', stream=True)
+        )
+
+    assert parts == ['{"tabela"', ': {}', '}']
+    assert generator.history[0] == ('Gere dados', '{"tabela": {}}')
+    assert generator.openai_client.chat.completions.create.call_args[1][
+        'stream'
+    ]
+
+
+def test_generate_data_stream_validates_eagerly(generator):
+    """Testa se o modo stream valida o banco antes de iterar a resposta."""
+    with pytest.raises(ValueError, match="'invalid_db' não foi encontrado"):
+        generator.generate_data('invalid_db', 'Gere dados', stream=True)
+
+    with patch.object(generator, 'generate_models', return_value='schema'):
+        with pytest.raises(ValueError, match='mínimo de 1000'):
+            generator.generate_data_stream(
+                'test_db', 'Gere dados', max_tokens=500
+            )
+
+    generator.openai_client.chat.completions.create.assert_not_called()
+
+
+def test_count_tokens_batch():
+    """Testa se várias mensagens são tokenizadas em uma única chamada."""
+    encoding = MagicMock()
+    encoding.encode_batch.return_value = [[1], [1, 2], [1, 2, 3]]
+    with patch(
+        'sdsdg_lib.generators._get_encoding', return_value=encoding
+    ), patch('sdsdg_lib.generators._MAX_TOKENIZER_THREADS', 8):
+        assert Generators.count_tokens_batch(['a', 'b', 'c'], 'gpt-4') == [
+            1,
+            2,
+            3,
+        ]
+
+    encoding.encode_batch.assert_called_once_with(
+        ['a', 'b', 'c'], num_threads=3
+    )
+
+
+def test_count_tokens_batch_caps_threads():
+    """Testa se a quantidade de threads do tiktoken é limitada em lotes grandes."""
+    encoding = MagicMock()
+    encoding.encode_batch.side_effect = lambda msgs, num_threads: [[1]] * len(
+        msgs
+    )
+    msgs = ['a'] * 20
+    with patch(
+        'sdsdg_lib.generators._get_encoding', return_value=encoding
+    ), patch('sdsdg_lib.generators._MAX_TOKENIZER_THREADS', 4):
+        assert Generators.count_tokens_batch(msgs, 'gpt-4') == [1] * 20
+
+    encoding.encode_batch.assert_called_once_with(msgs, num_threads=4)
+
+
+def test_openai_client_shared_by_api_key(generator):
+    """Testa se instâncias com a mesma chave compartilham o cliente OpenAI."""
+    first = Generators(generator.manager, OPENAI_API_KEY='shared-key')
+    second = Generators(generator.manager, OPENAI_API_KEY='shared-key')
+    other = Generators(generator.manager, OPENAI_API_KEY='other-key')
+
+    assert first.openai_client is second.openai_client
+    assert first.openai_client is not other.openai_client
+    assert first.openai_client is _get_openai_client('shared-key')
+
+
+def test_generate_models_save_to_file(generator, tmp_path):
+    """Testa se a estrutura gerada é salva na pasta de modelos."""
+    generator.models_dir = str(tmp_path / 'models')
+
+    structure = generator.generate_models('test_db', save_to_file=True)
+
+    saved = tmp_path / 'models' / 'test_db.txt'
+    assert saved.read_text(encoding='utf-8') == structure
+
+
+def test_generate_data_reuses_cached_result(generator):
+    """Testa se prompts repetidos reutilizam a resposta sem chamar a OpenAI."""
+    generator.cache_size = 128
+    create = generator.openai_client.chat.completions.create
+    with patch.object(generator, 'generate_models', return_value='schema'):
+        first = generator.generate_data('test_db', 'Gere 5 clientes')
+        second = generator.generate_data('test_db', 'Gere 5 clientes')
+        assert first == second == '{}'
+        assert create.call_count == 1
+
+        generator.generate_data('test_db', 'Gere 5 produtos')
+        assert create.call_count == 2
+
+        generator.cache_clear()
+        generator.generate_data('test_db', 'Gere 5 clientes')
+        assert create.call_count == 3
+
+    assert len(generator.history) == 4
+
+
+def test_result_cache_disabled_by_default(generator):
+    """Testa se, sem cache configurado, prompts repetidos geram novos dados."""
+    create = generator.openai_client.chat.completions.create
+    with patch.object(generator, 'generate_models', return_value='schema'):
+        generator.generate_data('test_db', 'Gere 5 clientes')
+        generator.generate_data('test_db', 'Gere 5 clientes')
+
+    assert generator.cache_size == 0
+    assert create.call_count == 2
+    assert not generator._result_cache
+
+
+def test_result_cache_evicts_oldest(generator):
+    """Testa se o cache de respostas descarta a entrada mais antiga."""
+    generator.cache_size = 1
+    create = generator.openai_client.chat.completions.create
+    with patch.object(generator, 'generate_models', return_value='schema'):
+        generator.generate_data('test_db', 'Gere 5 clientes')
+        generator.generate_data('test_db', 'Gere 5 produtos')
+        generator.generate_data('test_db', 'Gere 5 clientes')
+
+    assert create.call_count == 3
+
+
+def test_clear_models_cache(generator):
+    """Testa se a estrutura é refletida novamente após limpar o cache."""
+    assert generator.generate_models('test_db') == ''
+
+    with generator.manager.get_engine('test_db').begin() as connection:
+        connection.execute(text('CREATE TABLE cliente (id INTEGER)'))
+    assert generator.generate_models('test_db') == ''
+
+    generator.clear_models_cache('test_db')
+    assert generator.generate_models('test_db') == 'cliente(id:INTEGER)'
+
+
+def test_generate_data_batch(generator):
+    """Testa se vários prompts são enviados em paralelo com a mesma estrutura."""
+    prompts = [f'Gere {n} clientes' for n in range(5)]
+    with patch.object(
+        generator, 'generate_models', return_value='schema'
+    ) as generate_models:
+        results = asyncio.run(
+            generator.generate_data_batch(
+                'test_db', prompts, max_concurrency=2
+            )
+        )
+
+    assert results == ['{}'] * 5
+    generate_models.assert_called_once()
+    create = generator.async_client.chat.completions.create
+    assert create.await_count == 5
+    sent = [
+        call[1]['messages'][2]['content'] for call in create.call_args_list
+    ]
+    assert sorted(sent) == sorted(prompts)
+
+
+def test_generate_data_batch_offline(generator):
+    """Testa a criação de um lote na Batch API e a leitura do resultado."""
+    client = generator.openai_client
+    client.files.create.return_value.id = 'file-in'
+    client.batches.create.return_value.id = 'batch-1'
+
+    with patch.object(generator, 'generate_models', return_value='schema'):
+        batch_id = generator.generate_data_batch_offline(
+            'test_db', ['Gere 5 clientes', 'Gere 3 pedidos']
+        )
+
+    assert batch_id == 'batch-1'
+    client.batches.create.assert_called_once_with(
+        input_file_id='file-in',
+        endpoint='/v1/chat/completions',
+        completion_window='24h',
+    )
+    upload = client.files.create.call_args[1]
+    assert upload['purpose'] == 'batch'
+    requests = [json.loads(line) for line in upload['file'][1].splitlines()]
+    assert [r['custom_id'] for r in requests] == ['request-0', 'request-1']
+    assert requests[1]['body']['messages'][2]['content'] == 'Gere 3 pedidos'
+
+    client.batches.retrieve.return_value.status = 'in_progress'
+    assert generator.poll_batch('batch-1') is None
+
+    client.batches.retrieve.return_value.status = 'completed'
+    client.files.content.return_value.text = '\n'.join(
+        json.dumps(
+            {
+                'custom_id': custom_id,
+                'response': {
+                    'status_code': status,
+                    'body': {'choices': [{'message': {'content': content}}]},
+                },
+            }
+        )
+        for custom_id, status, content in [
+            ('request-1', 200, '{"pedido": {}}'),
+            ('request-0', 500, None),
+        ]
+    )
+    assert generator.poll_batch('batch-1') == [None, '{"pedido": {}}']
+    assert list(generator.history) == [('Gere 3 pedidos', '{"pedido": {}}')]
+
+    client.batches.retrieve.return_value.status = 'expired'
+    with pytest.raises(RuntimeError, match="status 'expired'"):
+        generator.poll_batch('batch-1')
+
+
+def test_structure_tokens_counted_once_per_model(generator):
+    """Testa se a estrutura do banco é tokenizada uma única vez por modelo."""
+    for prompt in ['Gere 5 clientes', 'Gere 3 pedidos']:
+        generator.generate_data('test_db', prompt)
+    generator.generate_data('test_db', 'Gere 5 clientes', model='gpt-4')
+
+    entry = generator._models_cache[('test_db', False)]
+    structure_calls = [
+        c
+        for c in generator.count_tokens.call_args_list
+        if c.args[0] == entry.code
+    ]
+    assert len(structure_calls) == 2
+    assert entry.tokens_by_model == {'gpt-3.5-turbo-16k': 10, 'gpt-4': 10}
+
+
+def test_sqlacodegen_path_resolved_once():
+    """Testa se o executável do sqlacodegen é localizado apenas no primeiro uso."""
+    _sqlacodegen_path.cache_clear()
+    with patch('shutil.which', return_value='/usr/bin/sqlacodegen') as which:
+        assert _sqlacodegen_path() == '/usr/bin/sqlacodegen'
+        assert _sqlacodegen_path() == '/usr/bin/sqlacodegen'
+
+    which.assert_called_once_with('sqlacodegen')
+    _sqlacodegen_path.cache_clear()
+
+
+def test_async_tokenization_runs_in_executor(generator):
+    """Testa se a versão assíncrona tokeniza o prompt fora da thread do event loop."""
+    threads = []
+    generator.count_tokens.side_effect = lambda msg, model: (
+        threads.append(threading.current_thread().name) or 10
+    )
+
+    with patch.object(generator, 'generate_models', return_value='schema'):
+        asyncio.run(generator.generate_data_async('test_db', 'Gere dados'))
+
+    assert threads
+    assert all(name.startswith('sdsdg-tokenizer') for name in threads)
+
+
+def test_build_messages_reuses_system_message():
+    """Testa se a mensagem de sistema é compartilhada entre as requisições."""
+    first = Generators._build_messages('schema', 'Gere 5 clientes')
+    second = Generators._build_messages('schema', 'Gere 3 pedidos')
+
+    assert first[0] is second[0] is _SYSTEM_MESSAGE
+    assert first[0] == {'role': 'system', 'content': _SYSTEM_PROMPT}
+
+
+def test_import_does_not_load_openai_or_tiktoken():
+    """Testa se importar a lib não carrega o SDK da OpenAI nem o tiktoken."""
+    code = (
+        'import sys, sdsdg_lib; '
+        "print(sorted(m for m in ('openai', 'tiktoken', 'httpx') "
+        'if m in sys.modules))'
+    )
+    result = subprocess.run(
+        [sys.executable, '-c', code],
+        capture_output=True,
+        check=True,
+        cwd=Path(sdsdg_lib.__file__).parent.parent,
+    )
+
+    assert result.stdout.decode('utf-8').strip() == '[]'
+
+
+def test_generate_data_batch_offline_caps_tokenizer_threads(
+    generator, monkeypatch
+):
+    """Testa se lotes offline grandes não abrem uma thread por prompt."""
+    monkeypatch.setattr(Generators, 'count_tokens_batch', _COUNT_TOKENS_BATCH)
+    monkeypatch.setattr('sdsdg_lib.generators._MAX_TOKENIZER_THREADS', 4)
+    encoding = sdsdg_lib.generators._get_encoding.return_value
+    encoding.encode_batch.side_effect = lambda msgs, num_threads: [
+        [0] * 10
+    ] * len(msgs)
+    prompts = [f'Gere {n} clientes' for n in range(200)]
+
+    with patch.object(generator, 'generate_models', return_value='schema'):
+        generator.generate_data_batch_offline('test_db', prompts)
+
+    encoding.encode_batch.assert_called_once_with(prompts, num_threads=4)
+
+
+def test_async_client_created_lazily(generator):
+    """Testa se o cliente assíncrono só é criado no primeiro uso e pode ser fechado."""
+    lazy = Generators(generator.manager, OPENAI_API_KEY='test-key')
+    assert lazy._async_client is None
+
+    client = MagicMock(close=AsyncMock())
+    with patch.object(
+        Generators, '_create_async_openai_client', return_value=client
+    ) as create:
+        assert lazy.async_client is client
+        assert lazy.async_client is client
+        create.assert_called_once_with('test-key')
+
+        asyncio.run(lazy.aclose())
+
+    client.close.assert_awaited_once()
+    assert lazy._async_client is None